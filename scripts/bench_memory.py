@@ -0,0 +1,112 @@
+"""
+Memory benchmark of reading the project board: the peak traced allocations (tracemalloc) and the peak resident size
+(getrusage) of going through every issue of a stubbed board of N pages, at two board sizes.
+
+    python scripts/bench_memory.py
+    python scripts/bench_memory.py --pages 20 200
+
+Each size is measured in a fresh process, both the way main.py reads the board (streamed pages ranked in windows)
+and by materialising the whole board with get_project_issues() for comparison.
+With streaming, the peak stays the same however many pages the board has.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_startup import INPUTS, SRC
+
+PAGE_SIZE = 100
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def stub_board(pages):
+    """Replace graphql._post with a board of `pages` full pages of issues."""
+    import graphql
+
+    def post(query, variables, headers=None):
+        page = int(variables['after'] or 0)
+        nodes = [
+            {
+                'id': f'PVTI_{page}_{n}',
+                'fieldValueByName': {'id': f'F_{page}_{n}', 'name': 'In Progress'},
+                'content': {
+                    'id': f'I_{page}_{n}',
+                    'title': f'Issue {page * PAGE_SIZE + n} of the stubbed board, with a title of a usual length',
+                    'number': page * PAGE_SIZE + n,
+                    'state': 'OPEN',
+                    'url': f'https://github.example.com/owner/repository/issues/{page * PAGE_SIZE + n}',
+                    'updatedAt': '2026-01-01T00:00:00Z',
+                    'repository': {'nameWithOwner': 'owner/repository'},
+                    'timelineItems': {'nodes': [{'createdAt': '2026-01-01T00:00:00Z'}]}
+                }
+            }
+            for n in range(PAGE_SIZE)
+        ]
+        page_info = {'endCursor': str(page + 1), 'hasNextPage': page + 1 < pages}
+        return StubResponse({'data': {'organization': {'projectV2': {'items': {'nodes': nodes, 'pageInfo': page_info}}}}})
+
+    graphql._post = post
+
+
+def measure(pages, mode):
+    os.environ.update(INPUTS, INPUT_CACHE_DIR=tempfile.mkdtemp())
+    sys.path.insert(0, SRC)
+    import config
+    import graphql
+    import main
+    import scheduler
+
+    stub_board(pages)
+    tracemalloc.start()
+
+    issues = 0
+    if mode == 'streamed':
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _, issue, _ in main.with_lookups(scheduler.windows(main.prefetch(main.get_issue_pages(), executor))):
+                issues += 1
+    else:
+        issues = len(graphql.get_project_issues(
+            owner=config.repository_owner,
+            owner_type=config.repository_owner_type,
+            project_number=config.project_number,
+            status_field_name=config.status_field_name,
+            filters={'open_only': True}
+        ))
+
+    _, peak = tracemalloc.get_traced_memory()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(f'{mode:>12} {pages:>6} pages {issues:>7} issues: peak traced {peak / 2**20:7.1f} MiB, '
+          f'max RSS {max_rss / 1024:7.1f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs=2, default=(20, 200), help='the two board sizes, in pages')
+    parser.add_argument('--measure', nargs=2, metavar=('PAGES', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(int(args.measure[0]), args.measure[1])
+        return
+
+    for mode in ('streamed', 'materialised'):
+        for pages in args.pages:
+            subprocess.run([sys.executable, __file__, '--measure', str(pages), mode], check=True)
+
+
+if __name__ == '__main__':
+    main()
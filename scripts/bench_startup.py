@@ -0,0 +1,131 @@
+"""
+Startup benchmark of the action: import time of the entry point (`-X importtime`) and the time from process
+start to the first request reaching GitHub, measured against a local stand-in of the GraphQL endpoint.
+
+    python scripts/bench_startup.py                     # with the local interpreter
+    python scripts/bench_startup.py --image qatesting   # with an image built by `docker build -t qatesting .`
+
+The stand-in answers every query with an error, so each run stops right after its first requests.
+"""
+import argparse
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+INPUTS = {
+    'GITHUB_REPOSITORY_OWNER': 'owner',
+    'GITHUB_REPOSITORY': 'owner/repository',
+    'GITHUB_SERVER_URL': 'http://127.0.0.1',
+    'INPUT_REPOSITORY_OWNER_TYPE': 'organization',
+    'INPUT_ENTERPRISE_GITHUB': 'True',
+    'INPUT_GH_TOKEN': 'token',
+    'INPUT_PROJECT_NUMBER': '1',
+    'INPUT_PROJECT_TITLE': 'Benchmark',
+    'INPUT_STATUS_FIELD_NAME': 'Status',
+}
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.server.first_request_at is None:
+            self.server.first_request_at = time.monotonic()
+
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'errors': [{'message': 'benchmark stand-in'}]}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.first_request_at = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def import_time():
+    """Cumulative import time of `main` in milliseconds, and its slowest direct imports."""
+    env = {**os.environ, **INPUTS, 'INPUT_CACHE_DIR': tempfile.mkdtemp()}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True
+    )
+
+    # Lines look like "import time: self [us] | cumulative | imported package", children indented under
+    # their parent and listed before it, so the direct imports of main are the ones right above it
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+
+        if depth == 0 and name.strip() == 'main':
+            return int(cumulative) / 1000, sorted(children, reverse=True)[:10]
+        if depth == 0:
+            children = []
+        elif depth == 1:
+            children.append((int(cumulative), name.strip()))
+
+    raise RuntimeError('main was not imported')
+
+
+def start_to_first_request(image=None):
+    """Seconds from starting the process (or container) to the first request reaching the stand-in."""
+    server = start_stand_in()
+    env = {**INPUTS, 'GITHUB_GRAPHQL_URL': f'http://127.0.0.1:{server.server_address[1]}/graphql'}
+
+    if image:
+        env['INPUT_CACHE_DIR'] = '/tmp/cache'
+        command = ['docker', 'run', '--rm', '--network', 'host']
+        for name, value in env.items():
+            command += ['-e', f'{name}={value}']
+        command.append(image)
+    else:
+        env['INPUT_CACHE_DIR'] = tempfile.mkdtemp()
+        command = [sys.executable, os.path.join(SRC, 'main.py')]
+
+    started = time.monotonic()
+    subprocess.run(command, env={**os.environ, **env}, capture_output=True, timeout=120)
+    server.shutdown()
+
+    if server.first_request_at is None:
+        raise RuntimeError('The action exited without sending any request')
+    return server.first_request_at - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='container image to measure instead of the local interpreter')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    total, slowest = import_time()
+    print(f'import main: {total:.1f} ms cumulative')
+    for cumulative, name in slowest:
+        print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+    timings = [start_to_first_request(args.image) for _ in range(args.runs)]
+    target = args.image or sys.executable
+    print(f'start to first request ({target}): median {statistics.median(timings) * 1000:.0f} ms, '
+          f'min {min(timings) * 1000:.0f} ms over {args.runs} runs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Check of the async client against a local HTTP/2 stand-in of the GraphQL endpoint: several batches of lookups
+go through one LookupSession, and every request of the run must share a single HTTP/2 connection.
+
+    pip install -r requirements.txt -r requirements-async.txt
+    python scripts/check_http2.py
+    python scripts/check_http2.py --issues 50 --batches 5
+
+The stand-in is built on h2 (installed with httpx[http2]) and serves TLS with a throwaway self-signed certificate
+made by `openssl`, trusted through SSL_CERT_FILE. Every even issue has a merged pull request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+
+from bench_startup import INPUTS, SRC
+
+
+class StandIn:
+    """Minimal HTTP/2 server answering the comment and timeline queries of the lookups."""
+
+    def __init__(self, certfile, keyfile):
+        self.context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.context.load_cert_chain(certfile, keyfile)
+        self.context.set_alpn_protocols(['h2'])
+
+        self.connections = 0
+        self.requests = 0
+        self.protocols = set()
+        self.port = None
+
+    def start(self):
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def serve():
+            server = await asyncio.start_server(self.handle, '127.0.0.1', 0, ssl=self.context)
+            self.port = server.sockets[0].getsockname()[1]
+            started.set()
+            await server.serve_forever()
+
+        threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True).start()
+        started.wait()
+
+    def answer(self, body):
+        query, variables = body['query'], body['variables']
+        if 'GetIssueComments' in query:
+            return {'data': {'node': {'comments': {'nodes': [], 'pageInfo': {'hasNextPage': False}}}}}
+        if 'GetIssueTimeline' in query:
+            merged_at = '2026-01-01T00:00:00Z' if int(variables['issueId'].split('_')[-1]) % 2 == 0 else None
+            source = {'id': f"PR_{variables['issueId']}", 'mergedAt': merged_at}
+            nodes = [{'__typename': 'CrossReferencedEvent', 'source': source}]
+            return {'data': {'node': {'timelineItems': {'nodes': nodes, 'pageInfo': {'hasNextPage': False}}}}}
+        return {'errors': [{'message': 'not served by the stand-in'}]}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.protocols.add(writer.get_extra_info('ssl_object').selected_alpn_protocol())
+
+        connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        bodies = {}
+        while data := await reader.read(65535):
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    bodies[event.stream_id] = b''
+                elif isinstance(event, h2.events.DataReceived):
+                    bodies[event.stream_id] += event.data
+                    connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    self.requests += 1
+                    body = json.dumps(self.answer(json.loads(bodies.pop(event.stream_id)))).encode()
+                    connection.send_headers(event.stream_id, [
+                        (':status', '200'),
+                        ('content-type', 'application/json'),
+                        ('content-length', str(len(body)))
+                    ])
+                    connection.send_data(event.stream_id, body, end_stream=True)
+
+            writer.write(connection.data_to_send())
+            await writer.drain()
+
+        writer.close()
+
+
+def self_signed_certificate(directory):
+    certfile, keyfile = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-keyout', keyfile, '-out', certfile,
+        '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost'
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--issues', type=int, default=20, help='issues looked up per batch')
+    parser.add_argument('--batches', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    certfile, keyfile = self_signed_certificate(directory)
+
+    stand_in = StandIn(certfile, keyfile)
+    stand_in.start()
+
+    os.environ.update(
+        INPUTS,
+        INPUT_CACHE_DIR=directory,
+        GITHUB_GRAPHQL_URL=f'https://localhost:{stand_in.port}/graphql',
+        SSL_CERT_FILE=certfile
+    )
+    sys.path.insert(0, SRC)
+    import async_graphql
+    import main as action
+
+    with async_graphql.LookupSession() as lookups:
+        for batch in range(args.batches):
+            issue_ids = [f'I_{batch}_{n}' for n in range(args.issues)]
+            results = lookups.lookup_issues(issue_ids, action.COMMENT_TEXT)
+
+            expected = {issue_id: (False, n % 2 == 0) for n, issue_id in enumerate(issue_ids)}
+            assert results == expected, f'Unexpected lookups in batch {batch}: {results}'
+
+    # A comment page and a timeline page per issue
+    assert stand_in.requests == 2 * args.issues * args.batches, f'{stand_in.requests} requests'
+    assert stand_in.protocols == {'h2'}, f'Negotiated {stand_in.protocols}'
+    assert stand_in.connections == 1, f'{stand_in.connections} connections for one session'
+
+    print(f'{stand_in.requests} requests in {args.batches} batches over {stand_in.connections} HTTP/2 connection')
+
+
+if __name__ == '__main__':
+    main()
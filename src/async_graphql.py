@@ -0,0 +1,340 @@
+import asyncio
+import contextlib
+import logging
+import time
+import config
+import graphql
+from breaker import breaker
+from budget import budget
+
+try:
+    import httpx
+except ImportError:  # Only needed when the async client is enabled
+    httpx = None
+
+"""
+Async variants of the query functions in graphql.py, sharing their queries, page sizers, circuit breaker and
+run budget.
+
+Every request of a session goes through one httpx client with HTTP/2, so many in-flight queries are multiplexed
+over a single TLS connection. A semaphore caps how many are in flight at once (`max_in_flight` input).
+The endpoint is `config.api_endpoint`, so a local HTTP/2 stand-in server can be used by setting GITHUB_GRAPHQL_URL
+(and SSL_CERT_FILE for its certificate).
+
+graphql.py stays the synchronous API; LookupSession is the synchronous entry point to the concurrent lookups.
+"""
+
+# httpx logs every request at INFO level
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+_client = None
+_semaphore = None
+
+@contextlib.asynccontextmanager
+async def session():
+    """Open the shared HTTP/2 client used by every function of this module."""
+    global _client, _semaphore
+
+    if httpx is None:
+        raise RuntimeError("The async client needs httpx with HTTP/2 support: pip install 'httpx[http2]'")
+
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=config.request_timeout,
+        headers={"Authorization": f"Bearer {config.gh_token}"}
+    ) as client:
+        _client = client
+        _semaphore = asyncio.Semaphore(config.max_in_flight)
+        try:
+            yield client
+        finally:
+            _client = None
+            _semaphore = None
+
+async def _post(query, variables, headers=None):
+    if _client is None:
+        raise RuntimeError("No open session, use `async with async_graphql.session():`")
+
+    breaker.check()
+
+    async with _semaphore:
+        # Clamped once the request is about to be sent, not while it was waiting for a slot
+        timeout = budget.request_timeout()
+        try:
+            response = await _client.post(
+                config.api_endpoint,
+                json={"query": query, "variables": variables},
+                headers=headers,
+                timeout=timeout
+            )
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return response
+
+async def _post_page(query, variables, headers=None, retries=3):
+    """Async counterpart of graphql._post_page, tuning the same page sizer of the query."""
+    page_sizer = graphql._page_sizer(query)
+
+    for attempt in range(retries + 1):
+        variables['first'] = page_sizer.size
+        started = time.monotonic()
+
+        try:
+            response = await _post(query, variables, headers)
+        except httpx.TimeoutException as e:
+            if attempt == retries:
+                raise
+            logging.warning(f"Request timed out with page size {variables['first']}: {e}")
+            page_sizer.shrink()
+            continue
+
+        elapsed = time.monotonic() - started
+
+        if response.status_code in graphql.RETRYABLE_STATUS_CODES:
+            data = {'errors': [{'message': f"HTTP {response.status_code} with page size {variables['first']}"}]}
+        else:
+            data = response.json()
+            if not graphql._is_timeout_error(data):
+                page_sizer.observe(elapsed)
+                return data
+
+        if attempt < retries:
+            logging.warning(f"Page of {variables['first']} failed, retrying with a smaller page: {data['errors']}")
+            page_sizer.shrink()
+
+    return data
+
+async def _iter_connection_pages(query, variables, connection_path, cursor_name='after', headers=None):
+    """Yield the cursor and nodes of each page of the connection found at `connection_path` in the response."""
+    try:
+        while True:
+            data = await _post_page(query, variables, headers)
+
+            if 'errors' in data:
+                logging.error(f"GraphQL query errors: {data['errors']}")
+                return
+
+            connection = data.get('data') or {}
+            for key in connection_path:
+                connection = connection.get(key) or {}
+
+            yield variables[cursor_name], connection.get('nodes', [])
+
+            pageinfo = connection.get('pageInfo', {})
+            if not pageinfo.get('hasNextPage'):
+                return
+
+            variables[cursor_name] = pageinfo.get('endCursor')
+
+    # A body that is not JSON (e.g. an HTML error page from a proxy) raises a ValueError, not an httpx error
+    except (httpx.HTTPError, ValueError) as e:
+        logging.error(f"Request error: {e}")
+
+async def _query(query, variables):
+    """Post a single query and return its data, or None on errors."""
+    try:
+        data = (await _post(query, variables)).json()
+    except (httpx.HTTPError, ValueError) as e:
+        logging.error(f"Request error: {e}")
+        return None
+
+    if 'errors' in data:
+        logging.error(f"GraphQL query errors: {data['errors']}")
+        return None
+
+    return data.get('data')
+
+async def iter_repo_issue_pages(owner, repository, after=None):
+    variables = {
+        'owner': owner,
+        'repo': repository,
+        'after': after
+    }
+
+    async for page in _iter_connection_pages(graphql.REPO_ISSUES_QUERY, variables, ('repository', 'issues')):
+        yield page
+
+async def get_repo_issues(owner, repository, after=None):
+    return [issue async for _, page in iter_repo_issue_pages(owner, repository, after) for issue in page]
+
+async def iter_project_issue_pages(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    variables = {
+        'owner': owner,
+        'projectNumber': project_number,
+        'status': status_field_name,
+        'after': after
+    }
+
+    query = graphql.PROJECT_ISSUES_QUERY.format(owner_type=owner_type)
+    async for after, nodes in _iter_connection_pages(query, variables, (owner_type, 'projectV2', 'items')):
+        if filters:
+            nodes = [
+                node for node in nodes
+                if node.get('content') and node['content'].get('id')
+                and not (filters.get('open_only') and node['content'].get('state') != 'OPEN')
+            ]
+        yield after, nodes
+
+async def get_project_issues(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    pages = iter_project_issue_pages(owner, owner_type, project_number, status_field_name, filters, after)
+    return [issue async for _, page in pages for issue in page]
+
+async def iter_project_item_pages(owner, owner_type, project_number, status_field_name, after=None):
+    variables = {
+        'owner': owner,
+        'projectNumber': project_number,
+        'status': status_field_name,
+        'after': after
+    }
+
+    query = graphql.PROJECT_ITEMS_QUERY.format(owner_type=owner_type)
+    async for _, page in _iter_connection_pages(query, variables, (owner_type, 'projectV2', 'items')):
+        yield page
+
+async def get_project_items(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    pages = iter_project_item_pages(owner, owner_type, project_number, status_field_name, after)
+    return [item async for page in pages for item in page]
+
+async def get_project_id_by_title(owner, project_title):
+    data = await _query(graphql.PROJECT_BY_TITLE_QUERY, {'owner': owner, 'projectTitle': project_title})
+    if not data:
+        return None
+
+    for project in data['organization']['projectsV2']['nodes']:
+        if project['title'] == project_title:
+            return project['id']
+    return None
+
+async def get_status_field(project_id, status_field_name):
+    data = await _query(graphql.PROJECT_FIELDS_QUERY, {'projectId': project_id})
+    if not data:
+        return None
+
+    for field in ((data.get('node') or {}).get('fields') or {}).get('nodes', []):
+        if field.get('name') == status_field_name and field['__typename'] == 'ProjectV2SingleSelectField':
+            return field
+
+    logging.warning(f"Status field '{status_field_name}' not found.")
+    return None
+
+async def get_status_field_id(project_id, status_field_name):
+    field = await get_status_field(project_id, status_field_name)
+    return field['id'] if field else None
+
+async def get_qatesting_status_option_id(project_id, status_field_name, status_field=None):
+    if status_field is None:
+        status_field = await get_status_field(project_id, status_field_name)
+
+    for option in (status_field or {}).get('options', []):
+        if option['name'] == "QA Testing":
+            return option['id']
+
+    logging.warning(f"Status 'QA Testing' not found.")
+    return None
+
+async def get_item_id_by_issue_id(project_id, issue_id):
+    data = await _query(graphql.PROJECT_ITEM_IDS_QUERY, {'projectId': project_id})
+    for item in (((data or {}).get('node') or {}).get('items') or {}).get('nodes', []):
+        if item.get('content') and item['content'].get('id') == issue_id:
+            return item['id']
+    return None
+
+async def get_issue_has_merged_pr(issue_id):
+    variables = {
+        'issueId': issue_id,
+        'afterCursor': None
+    }
+
+    pages = _iter_connection_pages(
+        graphql.ISSUE_TIMELINE_QUERY, variables, ('node', 'timelineItems'),
+        cursor_name='afterCursor', headers={"Accept": "application/vnd.github.v4+json"}
+    )
+
+    async for _, timeline_items in pages:
+        for item in timeline_items:
+            pr = item.get('source')
+            if item['__typename'] == 'CrossReferencedEvent' and isinstance(pr, dict) and pr.get('mergedAt'):
+                await pages.aclose()
+                return True  # A merged pull request was found
+
+    return False
+
+async def update_issue_status_to_qa_testing(owner, project_title, project_id, status_field_id, item_id, status_option_id):
+    variables = {
+        'projectId': project_id,
+        'itemId': item_id,
+        'statusFieldId': status_field_id,
+        'statusOptionId': status_option_id
+    }
+    return await _query(graphql.UPDATE_ITEM_STATUS_MUTATION, variables)
+
+async def iter_issue_comment_pages(issue_id):
+    variables = {
+        'issueId': issue_id,
+        'afterCursor': None
+    }
+
+    pages = _iter_connection_pages(graphql.ISSUE_COMMENTS_QUERY, variables, ('node', 'comments'), cursor_name='afterCursor')
+    async for _, comments in pages:
+        yield comments
+
+async def get_issue_comments(issue_id):
+    return [comment async for comments in iter_issue_comment_pages(issue_id) for comment in comments]
+
+async def _lookup_issue(issue_id, comment_text):
+    commented = False
+    async for comments in iter_issue_comment_pages(issue_id):
+        if any(comment_text in comment.get('body', '') for comment in comments):
+            commented = True
+            break
+
+    # Like the synchronous path, the timeline is not read for issues that were already commented on
+    has_merged_pr = False if commented else await get_issue_has_merged_pr(issue_id)
+    return commented, has_merged_pr
+
+async def lookup_issues_async(issue_ids, comment_text):
+    """Look up a batch of issues concurrently, within an open session."""
+    results = await asyncio.gather(*(_lookup_issue(issue_id, comment_text) for issue_id in issue_ids))
+    return dict(zip(issue_ids, results))
+
+class LookupSession:
+    """
+    Synchronous handle on one event loop and one HTTP/2 client, kept open across all the lookups of a run,
+    so the TLS connection is set up once rather than once per page.
+
+        with async_graphql.LookupSession() as lookups:
+            lookups.lookup_issues(issue_ids, comment_text)
+    """
+
+    def __init__(self):
+        self._runner = asyncio.Runner()
+        self._session = session()
+
+    def __enter__(self):
+        self._runner.run(self._session.__aenter__())
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._runner.run(self._session.__aexit__(*exc_info))
+        finally:
+            self._runner.close()
+
+    def lookup_issues(self, issue_ids, comment_text):
+        """
+        Check a batch of issues concurrently for the comment and for a merged pull request.
+        Returns a dict of issue id to a (commented, has_merged_pr) tuple.
+        """
+        return self._runner.run(lookup_issues_async(issue_ids, comment_text))
+
+def lookup_issues(issue_ids, comment_text):
+    """Look up a single batch of issues in a session of its own."""
+    with LookupSession() as lookups:
+        return lookups.lookup_issues(issue_ids, comment_text)
@@ -0,0 +1,37 @@
+import logging
+import threading
+import config
+
+"""
+Circuit breaker shared by every request of a run.
+When the server keeps failing, the run stops instead of piling more requests on a degraded instance.
+"""
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, max_failures):
+        self.max_failures = max_failures
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.failures >= self.max_failures
+
+    def check(self):
+        if self.is_open:
+            raise CircuitOpenError(f"{self.failures} consecutive requests failed, giving up on this run")
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.is_open:
+                logging.error(f"Circuit opened after {self.failures} consecutive failed requests")
+
+breaker = CircuitBreaker(config.max_consecutive_failures)
@@ -0,0 +1,36 @@
+import time
+import config
+
+"""
+Wall-clock budget of a run, shared by every request.
+Each request is given at most the time left in the budget, so a single slow page cannot run past the end of the run.
+"""
+
+class BudgetExhaustedError(Exception):
+    pass
+
+class RunBudget:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = None
+
+    def start(self):
+        self.deadline = time.monotonic() + self.seconds
+
+    def remaining(self):
+        if self.deadline is None:
+            return self.seconds
+        return self.deadline - time.monotonic()
+
+    @property
+    def is_exhausted(self):
+        return self.remaining() <= 0
+
+    def request_timeout(self):
+        """The request timeout clamped to the time left in the budget."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise BudgetExhaustedError(f"The time budget of {self.seconds:g}s of this run is exhausted")
+        return min(config.request_timeout, remaining)
+
+budget = RunBudget(config.run_budget_seconds)
@@ -13,3 +13,11 @@ project_number = int(os.environ['INPUT_PROJECT_NUMBER'])
 project_title = os.environ['INPUT_PROJECT_TITLE']
 api_endpoint = os.environ.get('GITHUB_GRAPHQL_URL', 'https://github.intranet.unicaf.org/api/graphql')
 status_field_name = os.environ['INPUT_STATUS_FIELD_NAME']
+rest_api_endpoint = os.environ.get('GITHUB_API_URL', 'https://github.intranet.unicaf.org/api/v3')
+use_rest = True if os.environ.get('INPUT_REST_FALLBACK') == 'True' else False
+cache_dir = os.environ.get('INPUT_CACHE_DIR', '.merged_pr_qatesting_cache')
+request_timeout = float(os.environ.get('INPUT_REQUEST_TIMEOUT') or 30)
+run_budget_seconds = float(os.environ.get('INPUT_RUN_BUDGET_SECONDS') or 50)
+max_consecutive_failures = int(os.environ.get('INPUT_MAX_CONSECUTIVE_FAILURES') or 5)
+use_async_client = True if os.environ.get('INPUT_ASYNC_CLIENT') == 'True' else False
+max_in_flight = int(os.environ.get('INPUT_MAX_IN_FLIGHT') or 20)
@@ -0,0 +1,37 @@
+import config
+import graphql
+import rest
+
+"""
+Per-issue lookups, served either by GraphQL or by the ETag cached REST API (`rest_fallback` input).
+The REST API needs the repository and number of the issue, so issues without them always go through GraphQL.
+"""
+
+def _rest_location(issue_content):
+    if not config.use_rest:
+        return None
+
+    repository = (issue_content.get('repository') or {}).get('nameWithOwner')
+    number = issue_content.get('number')
+    if not repository or not number:
+        return None
+
+    return repository, number
+
+def iter_issue_comment_pages(issue_content):
+    location = _rest_location(issue_content)
+    if location:
+        return rest.iter_issue_comment_pages(*location)
+    return graphql.iter_issue_comment_pages(issue_content['id'])
+
+def get_issue_comments(issue_content):
+    location = _rest_location(issue_content)
+    if location:
+        return rest.get_issue_comments(*location)
+    return graphql.get_issue_comments(issue_content['id'])
+
+def get_issue_has_merged_pr(issue_content):
+    location = _rest_location(issue_content)
+    if location:
+        return rest.get_issue_has_merged_pr(*location)
+    return graphql.get_issue_has_merged_pr(issue_content['id'])
@@ -1,27 +1,148 @@
-from pprint import pprint
+import hashlib
 import logging
+import time
 import requests
 import config
+import state
+from breaker import breaker, CircuitOpenError
+from budget import budget, BudgetExhaustedError
 
-logging.basicConfig(level=logging.DEBUG)  # Ensure logging is set up
+# Status codes returned by the server (or the proxy in front of it) when a page was too expensive to build in time
+RETRYABLE_STATUS_CODES = (502, 503, 504)
 
-def get_repo_issues(owner, repository, after=None, issues=None):
-    query = """
-    query GetRepoClosedIssues($owner: String!, $repo: String!, $after: String) {
+
+class PageSizer:
+    """
+    Tunes the page size of the paginated queries from the observed responses.
+    The size shrinks quickly on timeouts and server errors and grows slowly while responses stay fast,
+    so large boards are read in as few calls as the server can handle.
+    """
+
+    def __init__(self, size=100, minimum=10, maximum=100, fast_seconds=2.0, slow_seconds=10.0):
+        self.size = max(minimum, min(maximum, size))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.fast_seconds = fast_seconds
+        self.slow_seconds = slow_seconds
+
+    def shrink(self):
+        self.size = max(self.minimum, self.size // 2)
+
+    def observe(self, elapsed):
+        if elapsed >= self.slow_seconds:
+            self.size = max(self.minimum, self.size * 3 // 4)
+        elif elapsed <= self.fast_seconds:
+            self.size = min(self.maximum, self.size + max(1, self.size // 4))
+
+
+# One sizer per query, keyed by the query text: a page of issues with their timelines
+# costs the server far more than a page of comments, so their sizes are tuned apart
+page_sizers = {}
+
+
+def _page_sizer_key(query):
+    return hashlib.sha256(query.encode()).hexdigest()[:16]
+
+
+def _page_sizer(query):
+    page_sizer = page_sizers.get(query)
+    if page_sizer is None:
+        # Every run is a fresh process, so start from the size the previous runs settled on
+        # instead of a first page of 100 that is the most likely to time out
+        saved_size = state.load_page_sizes().get(_page_sizer_key(query))
+        page_sizer = page_sizers.setdefault(query, PageSizer(size=saved_size) if saved_size else PageSizer())
+    return page_sizer
+
+
+def save_page_sizes():
+    state.save_page_sizes({_page_sizer_key(query): page_sizer.size for query, page_sizer in page_sizers.items()})
+
+
+class PaginationError(Exception):
+    """A page could not be read. `after` is the cursor of that page, to resume from it on the next run."""
+
+    def __init__(self, message, after):
+        super().__init__(message)
+        self.after = after
+
+
+def _is_timeout_error(data):
+    return any('timeout' in str(error.get('message', '')).lower() for error in data.get('errors') or [])
+
+
+def _post(query, variables, headers=None):
+    """
+    Post a query with the request timeout clamped to the time left in the run, through the circuit breaker.
+    Raises CircuitOpenError instead of sending anything once too many requests in a row have failed,
+    and BudgetExhaustedError once the run is out of time.
+    """
+    breaker.check()
+    timeout = budget.request_timeout()
+
+    try:
+        response = requests.post(
+            config.api_endpoint,
+            json={"query": query, "variables": variables},
+            headers={"Authorization": f"Bearer {config.gh_token}", **(headers or {})},
+            timeout=timeout
+        )
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return response
+
+
+def _post_page(query, variables, headers=None, retries=3):
+    """
+    Post a paginated query with the current page size as the `$first` variable.
+    Timeouts and server errors shrink the page size and retry the same page.
+    """
+    page_sizer = _page_sizer(query)
+
+    for attempt in range(retries + 1):
+        variables['first'] = page_sizer.size
+        started = time.monotonic()
+
+        try:
+            response = _post(query, variables, headers)
+        except requests.Timeout as e:
+            if attempt == retries:
+                raise
+            logging.warning(f"Request timed out with page size {variables['first']}: {e}")
+            page_sizer.shrink()
+            continue
+
+        elapsed = time.monotonic() - started
+
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            data = {'errors': [{'message': f"HTTP {response.status_code} with page size {variables['first']}"}]}
+        else:
+            data = response.json()
+            if not _is_timeout_error(data):
+                page_sizer.observe(elapsed)
+                return data
+
+        if attempt < retries:
+            logging.warning(f"Page of {variables['first']} failed, retrying with a smaller page: {data['errors']}")
+            page_sizer.shrink()
+
+    return data
+
+REPO_ISSUES_QUERY = """
+    query GetRepoClosedIssues($owner: String!, $repo: String!, $first: Int!, $after: String) {
           repository(owner: $owner, name: $repo) {
-            issues(first: 100, after: $after, states: [OPEN]) {
+            issues(first: $first, after: $after, states: [OPEN]) {
               nodes {
                 id
                 title
                 number
                 url
-                assignees(first:100) {
-                  nodes {
-                    name
-                    email
-                    login
-                  }
-                }
                 projectItems(first: 10) {
                   nodes {
                     project {
@@ -42,54 +163,59 @@ def get_repo_issues(owner, repository, after=None, issues=None):
         }
     """
 
+def iter_repo_issue_pages(owner, repository, after=None):
+    """
+    Yield the open issues of the repository one page at a time, along with the cursor the page was requested with.
+    Raises PaginationError with the cursor of the page that could not be read.
+    """
+    query = REPO_ISSUES_QUERY
+
     variables = {
         'owner': owner,
         'repo': repository,
         'after': after
     }
 
-    response = requests.post(
-        config.api_endpoint,
-        json={"query": query, "variables": variables},
-        headers={"Authorization": f"Bearer {config.gh_token}"}
-    )
-
-    data = response.json()
-
-    if data.get('errors'):
-        print(data.get('errors'))
-   
-    # Add debug print statement
-    pprint(data)
-
-    repository_data = data.get('data', {}).get('repository', {})
-    issues_data = repository_data.get('issues', {})
-    pageinfo = issues_data.get('pageInfo', {})
-    nodes = issues_data.get('nodes', [])
-
-    if issues is None:
-        issues = []
-    issues = issues + nodes
-    if pageinfo.get('hasNextPage'):
-        return get_repo_issues(
-            owner=owner,
-            repository=repository,
-            after=pageinfo.get('endCursor'),
-            issues=issues,
-            status_field_name=status_field_name
-        )
+    while True:
+        try:
+            data = _post_page(query, variables)
+        except requests.RequestException as e:
+            raise PaginationError(f"Request error: {e}", variables['after']) from e
+        except (CircuitOpenError, BudgetExhaustedError) as e:
+            raise PaginationError(str(e), variables['after']) from e
+
+        if data.get('errors'):
+            raise PaginationError(f"GraphQL query errors: {data['errors']}", variables['after'])
 
+        repository_data = data.get('data', {}).get('repository', {})
+        issues_data = repository_data.get('issues', {})
+        pageinfo = issues_data.get('pageInfo', {})
+
+        yield variables['after'], issues_data.get('nodes', [])
+
+        if not pageinfo.get('hasNextPage'):
+            return
+
+        variables['after'] = pageinfo.get('endCursor')
+
+def get_repo_issues(owner, repository, after=None):
+    issues = []
+    try:
+        for _, page in iter_repo_issue_pages(owner, repository, after):
+            issues += page
+    except PaginationError as e:
+        logging.error(str(e))
+        return []
     return issues
 
-def get_project_issues(owner, owner_type, project_number, status_field_name, filters=None, after=None, issues=None):
-    query = f"""
-    query GetProjectIssues($owner: String!, $projectNumber: Int!, $status: String!, $after: String)  {{
+PROJECT_ISSUES_QUERY = """
+    query GetProjectIssues($owner: String!, $projectNumber: Int!, $status: String!, $first: Int!, $after: String)  {{
           {owner_type}(login: $owner) {{
             projectV2(number: $projectNumber) {{
               id
               title
               number
-              items(first: 100,after: $after) {{
+              items(first: $first, after: $after) {{
                 nodes {{
                   id
                   fieldValueByName(name: $status) {{
@@ -105,11 +231,15 @@ def get_project_issues(owner, owner_type, project_number, status_field_name, fil
                       number
                       state
                       url
-                      assignees(first:20) {{
+                      updatedAt
+                      repository {{
+                        nameWithOwner
+                      }}
+                      timelineItems(itemTypes: [CROSS_REFERENCED_EVENT], last: 1) {{
                         nodes {{
-                          name
-                          email
-                          login
+                          ... on CrossReferencedEvent {{
+                            createdAt
+                          }}
                         }}
                       }}
                     }}
@@ -127,6 +257,15 @@ def get_project_issues(owner, owner_type, project_number, status_field_name, fil
         }}
     """
 
+def iter_project_issue_pages(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    """
+    Yield the project issues one page at a time, along with the cursor the page was requested with,
+    so the caller can start working on a page while the next one is being fetched.
+    Raises PaginationError with the cursor of the page that could not be read, instead of ending early
+    as if the board was complete.
+    """
+    query = PROJECT_ISSUES_QUERY.format(owner_type=owner_type)
+
     variables = {
         'owner': owner,
         'projectNumber': project_number,
@@ -134,27 +273,22 @@ def get_project_issues(owner, owner_type, project_number, status_field_name, fil
         'after': after
     }
 
-    try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
-    
-        data = response.json()
-    
+    while True:
+        try:
+            data = _post_page(query, variables)
+        except requests.RequestException as e:
+            raise PaginationError(f"Request error: {e}", variables['after']) from e
+        except (CircuitOpenError, BudgetExhaustedError) as e:
+            raise PaginationError(str(e), variables['after']) from e
+
         if 'errors' in data:
-            logging.error(f"GraphQL query errors: {data['errors']}")
-            return []
-          
+            raise PaginationError(f"GraphQL query errors: {data['errors']}", variables['after'])
+
         owner_data = data.get('data', {}).get(owner_type, {})
         project_data = owner_data.get('projectV2', {})
         items_data = project_data.get('items', {})
         pageinfo = items_data.get('pageInfo', {})
         nodes = items_data.get('nodes', [])
-    
-        if issues is None:
-            issues = []
 
         if filters:
             filtered_issues = []
@@ -162,45 +296,43 @@ def get_project_issues(owner, owner_type, project_number, status_field_name, fil
                 issue_content = node.get('content', {})
                 if not issue_content:
                     continue
-    
+
                 issue_id = issue_content.get('id')
                 if not issue_id:
                     continue
-                
+
                 if filters.get('open_only') and node['content'].get('state') != 'OPEN':
                     logging.debug(f"Filtering out issue ID {issue_id} with state {issue_content.get('state')}")
                     continue
-                
+
                 filtered_issues.append(node)
-    
+
             nodes = filtered_issues
-    
-        issues = issues + nodes
-    
-        if pageinfo.get('hasNextPage'):
-            return get_project_issues(
-                owner=owner,
-                owner_type=owner_type,
-                project_number=project_number,
-                after=pageinfo.get('endCursor'),
-                filters=filters,
-                issues=issues,
-                status_field_name=status_field_name
-            )
-    
-        return issues
-    except requests.RequestException as e:
-        logging.error(f"Request error: {e}")
+
+        yield variables['after'], nodes
+
+        if not pageinfo.get('hasNextPage'):
+            return
+
+        variables['after'] = pageinfo.get('endCursor')
+
+def get_project_issues(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    issues = []
+    try:
+        for _, page in iter_project_issue_pages(owner, owner_type, project_number, status_field_name, filters, after):
+            issues += page
+    except PaginationError as e:
+        logging.error(str(e))
         return []
+    return issues
 
-def get_project_items(owner, owner_type, project_number, status_field_name, filters=None, after=None, items=None):
-    query = f"""
-    query GetProjectItems($owner: String!, $projectNumber: Int!, $status: String!, $after: String) {{
+PROJECT_ITEMS_QUERY = """
+    query GetProjectItems($owner: String!, $projectNumber: Int!, $status: String!, $first: Int!, $after: String) {{
       {owner_type}(login: $owner) {{
         projectV2(number: $projectNumber) {{
           id
           title
-          items(first: 100, after: $after) {{
+          items(first: $first, after: $after) {{
             nodes {{
               id
               fieldValueByName(name: $status) {{
@@ -215,13 +347,6 @@ def get_project_items(owner, owner_type, project_number, status_field_name, filt
                   title
                   state
                   url
-                  assignees(first: 10) {{
-                    nodes {{
-                      name
-                      email
-                      login
-                    }}
-                  }}
                 }}
               }}
             }}
@@ -235,7 +360,9 @@ def get_project_items(owner, owner_type, project_number, status_field_name, filt
     }}
     """
 
-    
+def iter_project_item_pages(owner, owner_type, project_number, status_field_name, after=None):
+    query = PROJECT_ITEMS_QUERY.format(owner_type=owner_type)
+
     variables = {
         'owner': owner,
         'projectNumber': project_number,
@@ -244,48 +371,36 @@ def get_project_items(owner, owner_type, project_number, status_field_name, filt
     }
 
     try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
-
-        data = response.json()
-
-        if 'errors' in data:
-            logging.error(f"GraphQL query errors: {data['errors']}")
-            return []
+        while True:
+            data = _post_page(query, variables)
 
-        owner_data = data.get('data', {}).get(owner_type, {})
-        project_data = owner_data.get('projectV2', {})
-        items_data = project_data.get('items', {})
-        pageinfo = items_data.get('pageInfo', {})
-        nodes = items_data.get('nodes', [])
+            if 'errors' in data:
+                logging.error(f"GraphQL query errors: {data['errors']}")
+                return
 
-        if items is None:
-            items = []
+            owner_data = data.get('data', {}).get(owner_type, {})
+            project_data = owner_data.get('projectV2', {})
+            items_data = project_data.get('items', {})
+            pageinfo = items_data.get('pageInfo', {})
 
-        items += nodes
+            yield items_data.get('nodes', [])
 
-        if pageinfo.get('hasNextPage'):
-            return get_project_items(
-                owner=owner,
-                owner_type=owner_type,
-                project_number=project_number,
-                status_field_name=status_field_name,
-                after=pageinfo.get('endCursor'),
-                items=items
-            )
+            if not pageinfo.get('hasNextPage'):
+                return
 
-        return items
+            variables['after'] = pageinfo.get('endCursor')
 
     except requests.RequestException as e:
         logging.error(f"Request error: {e}")
-        return []
 
+def get_project_items(owner, owner_type, project_number, status_field_name, filters=None, after=None):
+    items = []
+    for page in iter_project_item_pages(owner, owner_type, project_number, status_field_name, after):
+        items += page
+    return items
 
-def get_project_id_by_title(owner, project_title):
-    query = """
+
+PROJECT_BY_TITLE_QUERY = """
     query($owner: String!, $projectTitle: String!) {
       organization(login: $owner) {
         projectsV2(first: 10, query: $projectTitle) {
@@ -297,6 +412,9 @@ def get_project_id_by_title(owner, project_title):
       }
     }
     """
+
+def get_project_id_by_title(owner, project_title):
+    query = PROJECT_BY_TITLE_QUERY
     
     variables = {
         'owner': owner, 
@@ -304,11 +422,7 @@ def get_project_id_by_title(owner, project_title):
     }
 
     try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
+        response = _post(query, variables)
     
         data = response.json()
 
@@ -326,8 +440,7 @@ def get_project_id_by_title(owner, project_title):
         logging.error(f"Request error: {e}")
         return None
 
-def get_status_field_id(project_id, status_field_name):
-    query = """
+PROJECT_FIELDS_QUERY = """
     query($projectId: ID!) {
       node(id: $projectId) {
         ... on ProjectV2 {
@@ -348,16 +461,16 @@ def get_status_field_id(project_id, status_field_name):
       }
     }
     """
+
+def get_status_field(project_id, status_field_name):
+    """Return the status field of the project with its options, so its id and the option ids need a single request."""
+    query = PROJECT_FIELDS_QUERY
     variables = {
         'projectId': project_id
     }
 
     try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
+        response = _post(query, variables)
         
         data = response.json()
 
@@ -378,7 +491,7 @@ def get_status_field_id(project_id, status_field_name):
         fields = data['data']['node']['fields']['nodes']
         for field in fields:
             if field.get('name') == status_field_name and field['__typename'] == 'ProjectV2SingleSelectField':
-                return field['id']
+                return field
         
         logging.warning(f"Status field '{status_field_name}' not found.")
         return None
@@ -387,8 +500,11 @@ def get_status_field_id(project_id, status_field_name):
         logging.error(f"Request error: {e}")
         return None
 
-def get_item_id_by_issue_id(project_id, issue_id):
-    query = """
+def get_status_field_id(project_id, status_field_name):
+    status_field = get_status_field(project_id, status_field_name)
+    return status_field['id'] if status_field else None
+
+PROJECT_ITEM_IDS_QUERY = """
     query($projectId: ID!) {
       node(id: $projectId) {
         ... on ProjectV2 {
@@ -406,16 +522,15 @@ def get_item_id_by_issue_id(project_id, issue_id):
       }
     }
     """
+
+def get_item_id_by_issue_id(project_id, issue_id):
+    query = PROJECT_ITEM_IDS_QUERY
     variables = {
         "projectId": project_id
     }
     
     try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
+        response = _post(query, variables)
         
         data = response.json()
         project_items = data.get('data', {}).get('node', {}).get('items', {}).get('nodes', [])
@@ -430,87 +545,33 @@ def get_item_id_by_issue_id(project_id, issue_id):
         logging.error(f"Request error: {e}")
         return None
 
-def get_qatesting_status_option_id(project_id, status_field_name):
-    query = """
-    query($projectId: ID!) {
-      node(id: $projectId) {
-        ... on ProjectV2 {
-          fields(first: 100) {
-            nodes {
-              __typename
-              ... on ProjectV2SingleSelectField {
-                id
-                name
-                options {
-                  id
-                  name
-                }
-              }
-            }
-          }
-        }
-      }
-    }
-    """
-    variables = {
-        'projectId': project_id
-    }
-
-    try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": query, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
-        
-        data = response.json()
-
-        # Check for errors in the response
-        if 'errors' in data:
-            logging.error(f"GraphQL query errors: {data['errors']}")
-            return None
-        
-        # Ensure 'data' is in the response and is valid
-        if 'data' not in data or 'node' not in data['data'] or 'fields' not in data['data']['node']:
-            logging.error(f"Unexpected response structure: {data}")
-            return None
-        
-        # Log the response for debugging
-        logging.debug(f"GraphQL response: {data}")
+def get_qatesting_status_option_id(project_id, status_field_name, status_field=None):
+    # Reuse the status field when the caller already fetched it
+    if status_field is None:
+        status_field = get_status_field(project_id, status_field_name)
 
-        # Get fields from the response
-        fields = data['data']['node']['fields']['nodes']
-        for field in fields:
-            if field.get('name') == status_field_name and field['__typename'] == 'ProjectV2SingleSelectField':
-                # Look for the specific option "QA Testing"
-                for option in field.get('options', []):
-                    if option['name'] == "QA Testing":
-                        option_id = option['id']
-                        # logging.info(f"QA Testing Status Option ID: {option_id}")  # Log the ID for confirmation
-                        return option_id
-        
-        logging.warning(f"Status 'QA Testing' not found.")
-        return None
+    # Look for the specific option "QA Testing"
+    for option in (status_field or {}).get('options', []):
+        if option['name'] == "QA Testing":
+            option_id = option['id']
+            # logging.info(f"QA Testing Status Option ID: {option_id}")  # Log the ID for confirmation
+            return option_id
 
-    except requests.RequestException as e:
-        logging.error(f"Request error: {e}")
-        return None
+    logging.warning(f"Status 'QA Testing' not found.")
+    return None
 
-def get_issue_has_merged_pr(issue_id):
-    query = """
-    query GetIssueTimeline($issueId: ID!, $afterCursor: String) {
+ISSUE_TIMELINE_QUERY = """
+    query GetIssueTimeline($issueId: ID!, $first: Int!, $afterCursor: String) {
         node(id: $issueId) {
             ... on Issue {
-                timelineItems(first: 100, after: $afterCursor) {
+                timelineItems(first: $first, after: $afterCursor, itemTypes: [CROSS_REFERENCED_EVENT]) {
                     nodes {
                         __typename
                         ... on CrossReferencedEvent {
                             source {
                                 ... on PullRequest {
                                     id
-                                    number
                                     mergedAt
-                                    url
                                 }
                             }
                         }
@@ -524,6 +585,12 @@ def get_issue_has_merged_pr(issue_id):
         }
     }
     """
+
+def get_issue_has_merged_pr(issue_id):
+    """
+    Check the pull requests cross-referenced by the issue for a merged one.
+    """
+    query = ISSUE_TIMELINE_QUERY
     
     variables = {
         'issueId': issue_id,
@@ -532,16 +599,7 @@ def get_issue_has_merged_pr(issue_id):
 
     try:
         while True:
-            response = requests.post(
-                config.api_endpoint,
-                json={"query": query, "variables": variables},
-                headers={
-                    "Authorization": f"Bearer {config.gh_token}",
-                    "Accept": "application/vnd.github.v4+json"
-                }
-            )
-
-            data = response.json()
+            data = _post_page(query, variables, headers={"Accept": "application/vnd.github.v4+json"})
 
             # Error handling for GraphQL errors
             if 'errors' in data:
@@ -556,7 +614,6 @@ def get_issue_has_merged_pr(issue_id):
 
             timeline_items = timeline_data.get('nodes', [])
 
-            # Check each timeline item for a merged pull request
             for item in timeline_items:
                 if item['__typename'] == 'CrossReferencedEvent':
                     pr = item.get('source')
@@ -571,7 +628,6 @@ def get_issue_has_merged_pr(issue_id):
             # Set the cursor for the next page
             variables['afterCursor'] = pageinfo.get('endCursor')
 
-        # No merged pull request found in the timeline
         return False
 
     except requests.RequestException as e:
@@ -579,8 +635,7 @@ def get_issue_has_merged_pr(issue_id):
         return False
 
 
-def update_issue_status_to_qa_testing(owner, project_title, project_id, status_field_id, item_id, status_option_id):
-    mutation = """
+UPDATE_ITEM_STATUS_MUTATION = """
     mutation UpdateIssueStatus($projectId: ID!, $itemId: ID!, $statusFieldId: ID!, $statusOptionId: String!) {
         updateProjectV2ItemFieldValue(input: {
             projectId: $projectId,
@@ -596,6 +651,9 @@ def update_issue_status_to_qa_testing(owner, project_title, project_id, status_f
         }
     }
     """
+
+def update_issue_status_to_qa_testing(owner, project_title, project_id, status_field_id, item_id, status_option_id):
+    mutation = UPDATE_ITEM_STATUS_MUTATION
     
     variables = {
         'projectId': project_id,   
@@ -605,11 +663,7 @@ def update_issue_status_to_qa_testing(owner, project_title, project_id, status_f
     }
 
     try:
-        response = requests.post(
-            config.api_endpoint,
-            json={"query": mutation, "variables": variables},
-            headers={"Authorization": f"Bearer {config.gh_token}"}
-        )
+        response = _post(mutation, variables)
         
         data = response.json()
         if 'errors' in data:
@@ -622,12 +676,11 @@ def update_issue_status_to_qa_testing(owner, project_title, project_id, status_f
         return None
 
 
-def get_issue_comments(issue_id):
-    query = """
-    query GetIssueComments($issueId: ID!, $afterCursor: String) {
+ISSUE_COMMENTS_QUERY = """
+    query GetIssueComments($issueId: ID!, $first: Int!, $afterCursor: String) {
         node(id: $issueId) {
             ... on Issue {
-                comments(first: 100, after: $afterCursor) {
+                comments(first: $first, after: $afterCursor) {
                     nodes {
                         body
                         createdAt
@@ -645,41 +698,37 @@ def get_issue_comments(issue_id):
     }
     """
 
+def iter_issue_comment_pages(issue_id):
+    query = ISSUE_COMMENTS_QUERY
+
     variables = {
         'issueId': issue_id,
         'afterCursor': None
     }
 
-    all_comments = []
-
     try:
         while True:
-            response = requests.post(
-                config.api_endpoint,
-                json={"query": query, "variables": variables},
-                headers={"Authorization": f"Bearer {config.gh_token}"}
-            )
-
-            data = response.json()
+            data = _post_page(query, variables)
 
             if 'errors' in data:
                 logging.error(f"GraphQL query errors: {data['errors']}")
-                break
+                return
 
             comments_data = data.get('data', {}).get('node', {}).get('comments', {})
-            comments = comments_data.get('nodes', [])
-            all_comments.extend(comments)
+            yield comments_data.get('nodes', [])
 
             pageinfo = comments_data.get('pageInfo', {})
             if not pageinfo.get('hasNextPage'):
-                break
+                return
 
             # Set the cursor for the next page
             variables['afterCursor'] = pageinfo.get('endCursor')
 
-        return all_comments
-
     except requests.RequestException as e:
         logging.error(f"Request error: {e}")
-        return []
 
+def get_issue_comments(issue_id):
+    all_comments = []
+    for comments in iter_issue_comment_pages(issue_id):
+        all_comments.extend(comments)
+    return all_comments
@@ -1,161 +1,298 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 from logger import logger
 import logging
-import json
-import requests
 import config
+import datasource
 import graphql
+import scheduler
+import state
+from breaker import CircuitOpenError
+from budget import budget, BudgetExhaustedError
+from graphql import PaginationError
 
-def check_comment_exists(issue_id, comment_text):
+COMMENT_TEXT = "This issue is ready for testing. Please proceed accordingly in 15 minutes."
+
+def check_comment_exists(issue_content, comment_text):
     """Check if the comment already exists on the issue."""
-    comments = graphql.get_issue_comments(issue_id)
-    for comment in comments:
-        if comment_text in comment.get('body', ''):
-            return True
+    # Stop at the first matching page instead of loading every comment of the issue
+    for comments in datasource.iter_issue_comment_pages(issue_content):
+        for comment in comments:
+            if comment_text in comment.get('body', ''):
+                return True
     return False
 
-def notify_change_status():
+def prefetch(pages, executor):
+    """Return the pages while the next one is already being requested in the background."""
+    pages = iter(pages)
+
+    def drain(future):
+        while True:
+            page = future.result()
+            if page is None:
+                return
+            future = executor.submit(next, pages, None)
+            yield page
+
+    # Request the first page right away rather than on the first iteration
+    return drain(executor.submit(next, pages, None))
+
+def get_issue_pages(after=None):
     # Fetch issues based on whether it's an enterprise or not
     if config.is_enterprise:
-        issues = graphql.get_project_issues(
+        yield from graphql.iter_project_issue_pages(
             owner=config.repository_owner,
             owner_type=config.repository_owner_type,
             project_number=config.project_number,
             status_field_name=config.status_field_name,
-            filters={'open_only': True}
+            filters={'open_only': True},
+            after=after
         )
     else:
-        issues = graphql.get_repo_issues(
+        yield from graphql.iter_repo_issue_pages(
             owner=config.repository_owner,
             repository=config.repository_name,
-            status_field_name=config.status_field_name
+            after=after
         )
 
-    if not issues:
-        logger.info('No issues have been found')
+def needs_lookup(issue):
+    """Whether update_issue gets as far as the comment and merged pull request lookups for the issue."""
+    issue_content = issue.get('content') or {}
+    field_value = issue.get('fieldValueByName')
+    return bool(issue_content.get('id')) and issue.get('state') != 'CLOSED' and (field_value or {}).get('name') != 'QA Testing'
+
+def use_async_client():
+    if not config.use_async_client or config.use_rest:
+        return False
+
+    import async_graphql  # httpx is only imported when the async client is enabled
+    if async_graphql.httpx is None:
+        logger.warning("The async client needs httpx, which is not installed (see requirements-async.txt). Checking the issues one at a time.")
+        return False
+    return True
+
+def lookup_session():
+    """The session the lookups of the whole run go through: one HTTP/2 client with the async client, else nothing."""
+    if use_async_client():
+        import async_graphql
+        return async_graphql.LookupSession()
+    return contextlib.nullcontext()
+
+def with_lookups(pages, session=None):
+    """
+    Yield the cursor, the issue and its (commented, has_merged_pr) lookup for every issue of the pages.
+    With a lookup session, the issues of a page (or window) are looked up concurrently over its HTTP/2 connection,
+    `max_in_flight` at a time. Each chunk is handed out before the next one is looked up, so its updates are applied
+    even when a later chunk is cut short. Otherwise the lookup is None and update_issue does it itself.
+    """
+    for after, page in pages:
+        if session is None:
+            for issue in page:
+                yield after, issue, None
+            continue
+
+        for start in range(0, len(page), config.max_in_flight):
+            chunk = page[start:start + config.max_in_flight]
+            lookups = {}
+
+            issue_ids = [issue['content']['id'] for issue in chunk if needs_lookup(issue)]
+            # No lookups are started once the run is out of time, the caller stops at the first issue
+            if issue_ids and not budget.is_exhausted:
+                try:
+                    lookups = session.lookup_issues(issue_ids, COMMENT_TEXT)
+                except (CircuitOpenError, BudgetExhaustedError) as e:
+                    # Left to update_issue, which stops the run at the first issue of this chunk
+                    logger.warning(f'Lookups of the issues interrupted: {e}')
+
+            for issue in chunk:
+                yield after, issue, lookups.get((issue.get('content') or {}).get('id'))
+
+def update_issue(issue, project_title, project_id, status_field_id, status_option_id, lookup=None):
+    # Skip the issues if they are closed
+    if issue.get('state') == 'CLOSED':
         return
 
-    #----------------------------------------------------------------------------------------
-    # Get the project_id, status_field_id and status_option_id 
-    #----------------------------------------------------------------------------------------
+    # Print the issue object for debugging
+    # print("Issue object: ", json.dumps(issue, indent=4))
+
+    # Ensure the issue contains content
+    issue_content = issue.get('content', {})
+    if not issue_content:
+        return
+
+    issue_id = issue_content.get('id')
+    if not issue_id:
+        return
+
+    # Debugging output for the issue
+    # logger.info("Issue object: %s", json.dumps(issue, indent=4))
+
+    # Safely get the fieldValueByName and current status
+    field_value = issue.get('fieldValueByName')
+    current_status = field_value.get('name') if field_value else None
+    # logger.info(f'The current status of {issue_id} is: {current_status}')
+
+    if current_status == 'QA Testing':
+        return # skip the issue 
+
+    # Already resolved together with the rest of the page when the async client is enabled
+    commented, has_merged_pr = lookup or (check_comment_exists(issue_content, COMMENT_TEXT), None)
+
+    if commented:
+        return # skip the issue if it was in QA Testing before (the comment already exists)
+        
+    issue_title = issue.get('title')
+
+    if has_merged_pr is None:
+        has_merged_pr = datasource.get_issue_has_merged_pr(issue_content)
+    if has_merged_pr:  
+        
+        logger.debug(f'Issue object: {issue}')
+
+        logger.info(f'Proceeding to update the status to QA Testing as it contains a merged PR.')
+
+        # The issues are items of the project, so the item id is the id of the issue node itself
+        item_id = issue.get('id')
+        if not item_id:
+            logger.warning(f'No matching item found for issue ID: {issue_id}.')
+            return #  Skip the issue as it cannot be updated
+
+        # Proceed to update the status
 
+        update_result = graphql.update_issue_status_to_qa_testing(
+            owner=config.repository_owner,
+            project_title=project_title,
+            project_id=project_id,
+            status_field_id=status_field_id,
+            item_id=item_id,
+            status_option_id=status_option_id
+        )
+
+        if update_result:
+            logger.info(f'Successfully updated issue {issue_id} to QA Testing.')
+        else:
+            logger.error(f'Failed to update issue {issue_id}.')
+
+def notify_change_status():
+    # The issues and the project fields do not depend on each other,
+    # so they are all requested at once and only awaited when needed
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            return process_issues(executor)
+    except (CircuitOpenError, BudgetExhaustedError) as e:
+        logger.error(f'Stopping the run: {e}')
+    finally:
+        graphql.save_page_sizes()
+
+def process_issues(executor):
     project_title = 'Requests Product Backlog'
-    
-    project_id = graphql.get_project_id_by_title(
-        owner=config.repository_owner, 
+
+    # Continue from where the previous run ran out of time, if it did
+    resume_after, resume_done_ids = state.load_resume_cursor()
+    if resume_after or resume_done_ids:
+        logger.info(f'Resuming from cursor {resume_after}, skipping {len(resume_done_ids)} items already handled')
+
+    # Only a window of issues is held at a time (plus the page being prefetched),
+    # so memory stays flat however large the board is
+    issue_pages = prefetch(get_issue_pages(after=resume_after), executor)
+
+    project_future = executor.submit(
+        graphql.get_project_id_by_title,
+        owner=config.repository_owner,
         project_title=project_title
     )
 
+    #----------------------------------------------------------------------------------------
+    # Get the project_id, status_field_id and status_option_id 
+    #----------------------------------------------------------------------------------------
+
+    project_id = project_future.result()
+
     # logger.info(f'Printing the project_id: {project_id}')
 
     if not project_id:
         logging.error(f"Project {project_title} not found.")
         return None
     
-    status_field_id = graphql.get_status_field_id(
+    # The field id and its option ids come from the same query, so the fields are fetched once
+    status_field = graphql.get_status_field(
         project_id=project_id,
         status_field_name=config.status_field_name
     )
 
     # logger.info(f"Printing the status_field_id: {status_field_id}")
 
-    if not status_field_id:
+    if not status_field:
         logging.error(f"Status field not found in project {project_title}")
         return None
 
+    status_field_id = status_field['id']
     status_option_id = graphql.get_qatesting_status_option_id(
         project_id=project_id,
-        status_field_name=config.status_field_name
+        status_field_name=config.status_field_name,
+        status_field=status_field
     )
 
     #----------------------------------------------------------------------------------------
 
-    items = graphql.get_project_items(
-        owner=config.repository_owner, 
-        owner_type=config.repository_owner_type,
-        project_number=config.project_number,
-        status_field_name=config.status_field_name
-    )
+    issues_found = False
 
-    # Log fetched project items
-    # logger.info(f'Fetched project items: {json.dumps(items, indent=4)}')
+    # The items handled since the cursor `after`, saved with it so the next run skips them
+    after = resume_after
+    done_ids = set(resume_done_ids)
 
-    for issue in issues:
-        # Skip the issues if they are closed
-        if issue.get('state') == 'CLOSED':
-            continue
+    try:
+        # Each window of the board is served most likely to change first, so a run cut short still reaches
+        # the issues whose pull requests were just merged. A window is resumed from its first page,
+        # skipping the items it already handled
+        with lookup_session() as session:
+            issue_windows = scheduler.windows(issue_pages, skip_ids=resume_done_ids)
+            for issue_after, issue, lookup in with_lookups(issue_windows, session):
+                # The resumed items stay with the first window, it starts later when its first pages were all handled
+                if issue_after != after:
+                    after, done_ids = issue_after, set() if issues_found else done_ids
 
-        # Print the issue object for debugging
-        # print("Issue object: ", json.dumps(issue, indent=4))
+                issues_found = True
 
-        # Ensure the issue contains content
-        issue_content = issue.get('content', {})
-        if not issue_content:
-            continue
+                if budget.is_exhausted:
+                    logger.warning('The time budget of this run is exhausted, stopping.')
+                    state.save_resume_cursor(after, done_ids)
+                    return
 
-        issue_id = issue_content.get('id')
-        if not issue_id:
-            continue
+                update_issue(issue, project_title, project_id, status_field_id, status_option_id, lookup)
+                done_ids.add(issue.get('id'))
 
-        # Debugging output for the issue
-        # logger.info("Issue object: %s", json.dumps(issue, indent=4))
-
-        # Safely get the fieldValueByName and current status
-        field_value = issue.get('fieldValueByName')
-        current_status = field_value.get('name') if field_value else None
-        # logger.info(f'The current status of {issue_id} is: {current_status}')
-
-        comment_text = "This issue is ready for testing. Please proceed accordingly in 15 minutes."
-
-        if current_status == 'QA Testing':
-            continue # skip the issue 
-
-        if check_comment_exists(issue_id, comment_text):
-            continue # skip the issue if it was in QA Testing before (the comment already exists)
-            
-        issue_title = issue.get('title')
-
-        has_merged_pr = graphql.get_issue_has_merged_pr(issue_id)
-        if has_merged_pr:  
-            
-            print("Issue object: ", json.dumps(issue, indent=4))
-
-            logger.info(f'Proceeding to update the status to QA Testing as it contains a merged PR.')
-
-            # Find the item id for the issue
-            item_found = False
-            for item in items:
-                if item.get('content') and item['content'].get('id') == issue_id:
-                    item_id = item['id']
-                    
-                    item_found = True
-                    
-                    # Proceed to update the status
-
-                    update_result = graphql.update_issue_status_to_qa_testing(
-                        owner=config.repository_owner,
-                        project_title=project_title,
-                        project_id=project_id,
-                        status_field_id=status_field_id,
-                        item_id=item_id,
-                        status_option_id=status_option_id
-                    )
-    
-                    if update_result:
-                        logger.info(f'Successfully updated issue {issue_id} to QA Testing.')
-                    else:
-                        logger.error(f'Failed to update issue {issue_id}.')
-                    break  # Break out of the loop once updated
+    except PaginationError as e:
+        # The issues read before it were all processed, so the next run starts from the page that failed
+        logger.error(f'Stopping the run: {e}')
+        state.save_resume_cursor(e.after, done_ids if e.after == after else ())
+        return
 
-            if not item_found:
-                logger.warning(f'No matching item found for issue ID: {issue_id}.')
-                continue #  Skip the issue as it cannot be updated
+    except (CircuitOpenError, BudgetExhaustedError) as e:
+        logger.error(f'Stopping the run: {e}')
+        state.save_resume_cursor(after, done_ids)
+        return
+
+    # Every issue has been processed, the next run starts from the beginning
+    state.clear_resume_cursor()
+
+    if not issues_found:
+        logger.info('No issues have been found')
 
                 
 def main():
+    budget.start()
+
     logger.info('Process started...')
     if config.dry_run:
         logger.info('DRY RUN MODE ON!')
 
+    # Held until the process exits, so a slow run is never overlapped by the next scheduled one
+    lock = state.acquire_lock()
+    if not lock:
+        logger.warning('Another run is still in progress, skipping this one.')
+        return
+
     notify_change_status()
 
 if __name__ == "__main__":
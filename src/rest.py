@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import requests
+import config
+from breaker import breaker
+from budget import budget
+
+"""
+REST implementations of the per-issue lookups.
+
+Every response is stored on disk together with its ETag and sent back as `If-None-Match` on the next run.
+An unchanged issue is answered with 304 Not Modified, which does not count against the rate limit.
+"""
+
+def _cache_path(url):
+    return os.path.join(config.cache_dir, 'etags', hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+def _load_cached(url):
+    try:
+        with open(_cache_path(url)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _store_cached(url, entry):
+    path = _cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temporary file first so a crashed run never leaves half an entry behind
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+def _get_cached(url):
+    """
+    Get a page from the REST API, answering it from the ETag cache when the server reports it unchanged.
+    Returns the decoded body and the url of the next page (or None).
+    """
+    headers = {
+        "Authorization": f"Bearer {config.gh_token}",
+        "Accept": "application/vnd.github+json"
+    }
+
+    cached = _load_cached(url)
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+
+    breaker.check()
+    timeout = budget.request_timeout()
+
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    if response.status_code == 304 and cached:
+        logging.debug(f"Not modified, using the cached response: {url}")
+        return cached['body'], cached.get('next')
+
+    response.raise_for_status()
+
+    body = response.json()
+    next_url = response.links.get('next', {}).get('url')
+
+    if response.headers.get('ETag'):
+        _store_cached(url, {'etag': response.headers['ETag'], 'body': body, 'next': next_url})
+
+    return body, next_url
+
+def _iter_pages(path):
+    url = f"{config.rest_api_endpoint}{path}?per_page=100"
+    while url:
+        body, url = _get_cached(url)
+        yield body
+
+def iter_issue_comment_pages(repository, number):
+    try:
+        yield from _iter_pages(f"/repos/{repository}/issues/{number}/comments")
+
+    except requests.RequestException as e:
+        logging.error(f"Request error: {e}")
+
+def get_issue_comments(repository, number):
+    all_comments = []
+    for comments in iter_issue_comment_pages(repository, number):
+        all_comments.extend(comments)
+    return all_comments
+
+def get_issue_has_merged_pr(repository, number):
+    try:
+        for events in _iter_pages(f"/repos/{repository}/issues/{number}/timeline"):
+            for event in events:
+                if event.get('event') != 'cross-referenced':
+                    continue
+
+                source_issue = (event.get('source') or {}).get('issue') or {}
+                pull_request = source_issue.get('pull_request') or {}
+                if pull_request.get('merged_at'):
+                    return True  # A merged pull request was found
+
+        return False
+
+    except requests.RequestException as e:
+        logging.error(f"Request error: {e}")
+        return False
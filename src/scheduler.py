@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from budget import budget
+from graphql import PaginationError
+
+"""
+Ordering of the issues by how likely they are to need a status change, so that a run cut short
+by its time budget still reaches the issues whose pull requests were just merged.
+"""
+
+PRIORITY_STATUSES = ('In Review', 'In Progress')
+
+# Issues updated or cross-referenced within this period are served before the rest of their window
+RECENT_WINDOW = timedelta(hours=24)
+
+# Issues ranked together, the most that a run holds at a time
+WINDOW_SIZE = 500
+
+def _last_activity(issue):
+    """The latest of the issue's update and its last cross-reference, as an ISO 8601 string."""
+    content = issue.get('content') or {}
+    cross_references = (content.get('timelineItems') or {}).get('nodes') or []
+    timestamps = [content.get('updatedAt')] + [event.get('createdAt') for event in cross_references if event]
+    return max((timestamp for timestamp in timestamps if timestamp), default='')
+
+def _status(issue):
+    field_value = issue.get('fieldValueByName')
+    return field_value.get('name') if field_value else None
+
+def priority_key(issue, recent_since):
+    last_activity = _last_activity(issue)
+    # ISO 8601 timestamps in UTC compare correctly as strings
+    return (last_activity >= recent_since, _status(issue) in PRIORITY_STATUSES, last_activity)
+
+def windows(pages, size=WINDOW_SIZE, now=None, skip_ids=()):
+    """
+    Group the pages into windows of up to `size` issues and yield each window most likely to change first,
+    along with the cursor of its first page. The ranking happens while the pages are read, in the one regular pass,
+    so only a window of issues is held at a time. A run resumes from the start of the window it did not finish,
+    and `skip_ids` leaves out the items the previous run already handled there, so it always moves forward.
+
+    Collecting stops early once the run is out of time, and a page that cannot be read ends the window there:
+    the issues read so far are still yielded before the PaginationError is raised again with the failed cursor.
+    """
+    now = now or datetime.now(timezone.utc)
+    recent_since = (now - RECENT_WINDOW).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def ranked(issues):
+        return sorted(issues, key=lambda issue: priority_key(issue, recent_since), reverse=True)
+
+    pages = iter(pages)
+    while True:
+        window_after, window = None, []
+
+        try:
+            for after, page in pages:
+                if not window:
+                    window_after = after
+                window += [issue for issue in page if issue.get('id') not in skip_ids]
+
+                if len(window) >= size or budget.is_exhausted:
+                    break
+            else:
+                if window:
+                    yield window_after, ranked(window)
+                return
+
+        except PaginationError:
+            if window:
+                yield window_after, ranked(window)
+            raise
+
+        yield window_after, ranked(window)
@@ -0,0 +1,63 @@
+import fcntl
+import json
+import logging
+import os
+import config
+
+"""
+State kept in the cache directory between runs: the lock that keeps runs from overlapping,
+the position (page cursor and items already handled) where an interrupted run has to resume,
+and the page sizes the previous runs settled on.
+"""
+
+def _path(name):
+    os.makedirs(config.cache_dir, exist_ok=True)
+    return os.path.join(config.cache_dir, name)
+
+def acquire_lock():
+    """
+    Take the run lock without waiting. Returns the open lock file, or None if another run holds it.
+    The lock is released by the OS when the process exits, even if it crashes.
+    """
+    lock_file = open(_path('run.lock'), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def load_resume_cursor():
+    """
+    Returns the cursor to resume from and the ids of the project items already handled from it,
+    so a run cut short in the middle of a page still moves forward.
+    """
+    try:
+        with open(_path('resume.json')) as f:
+            resume = json.load(f)
+        return resume.get('after'), set(resume.get('done') or [])
+    except (OSError, ValueError, AttributeError):
+        return None, set()
+
+def save_resume_cursor(after, done_ids=()):
+    with open(_path('resume.json'), 'w') as f:
+        json.dump({'after': after, 'done': sorted(done_ids)}, f)
+    logging.info(f"Saved the cursor to resume from on the next run: {after} ({len(done_ids)} items already handled)")
+
+def clear_resume_cursor():
+    try:
+        os.remove(_path('resume.json'))
+    except FileNotFoundError:
+        pass
+
+def load_page_sizes():
+    try:
+        with open(_path('page_sizes.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_page_sizes(sizes):
+    # Keep the sizes of the queries this run did not send
+    with open(_path('page_sizes.json'), 'w') as f:
+        json.dump({**load_page_sizes(), **sizes}, f)